@@ -7,20 +7,44 @@ import os
 
 # Source website configuration
 SOURCE_URL = os.getenv("CHESS_CALENDAR_URL", "https://www.austinchesstournaments.com/events/")
+# Additional listing pages (comma-separated), processed concurrently with SOURCE_URL
+EXTRA_SOURCE_URLS = [
+    url.strip() for url in os.getenv("CHESS_CALENDAR_EXTRA_URLS", "").split(",") if url.strip()
+]
 
 # LLM API configuration
 LLM_API_URL = "https://ai.hackclub.com/chat/completions"
-LLM_MAX_RETRIES = 3
-LLM_RETRY_DELAY = 2
+LLM_MAX_RETRIES = 3  # Default request attempts per batch; repair prompts are counted separately
+LLM_BACKOFF_BASE = 1.0  # Seconds before the first retry, doubled each attempt
+LLM_BACKOFF_MAX = 30.0
+LLM_BACKOFF_JITTER = 1.0
+LLM_RETRYABLE_STATUS_CODES = (408, 429)  # Retried in addition to any 5xx
+LLM_CONCURRENCY = 2  # Maximum LLM requests in flight when scraping several pages
+LLM_MAX_REPAIR_RETRIES = 2  # Follow-up requests asking the LLM to fix invalid JSON
+LLM_MAX_INPUT_TOKENS = 3000  # Budget for scraped text in the prompt
+LLM_BYTES_PER_TOKEN = 4  # Conservative UTF-8 bytes-per-token estimate
+LLM_CACHE_TTL = 24 * 60 * 60  # Seconds before a cached LLM response expires
 
 # Calendar configuration
 OUTPUT_FILE = os.getenv("CHESS_CALENDAR_OUTPUT", "calendar.ics")
 CALENDAR_CREATOR = "Chess Tournament Calendar Feed"
+CALENDAR_UID_DOMAIN = "chess-calendar-feed"
 DEFAULT_EVENT_DURATION_HOURS = 3
 
+# Cache configuration
+CACHE_DIR = os.getenv(
+    "CHESS_CALENDAR_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "chess_calendar")
+)
+
 # Scraping configuration
 REQUEST_TIMEOUT = 30
+SCRAPE_CONCURRENCY = 10  # Maximum source pages fetched at once
+HTTP_POOL_CONNECTIONS = 4  # Distinct hosts kept in the connection pool
+HTTP_POOL_MAXSIZE = SCRAPE_CONCURRENCY  # Reusable connections per host
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+HTML_PARSER = "lxml"
+SCRAPE_CACHE_TTL = 7 * 24 * 60 * 60  # Seconds a page may be revalidated before a full re-fetch
 
 # Event selectors (tried in order)
 EVENT_SELECTORS = [
@@ -30,10 +54,22 @@ EVENT_SELECTORS = [
     '[class*="event"]',
     '[class*="tournament"]'
 ]
+EVENT_SELECTOR_UNION = ", ".join(EVENT_SELECTORS)
 
-# LLM prompt template
-LLM_PROMPT_TEMPLATE = """
-Please convert the following chess tournament events text into a JSON array.
+# Field selectors for reading events straight from event cards, skipping the
+# LLM when every card on a page yields a complete event
+EVENT_FIELD_SELECTORS = {
+    'title': '.event-title, h2, h3',
+    'dates': 'time[datetime]',  # First is the start, an optional second is the end
+    'location': '.event-location',
+    'description': '.event-description'
+}
+EXTRACT_MIN_EVENTS = 1  # Fewer directly extracted events than this falls back to the LLM
+
+# LLM system prompt. Kept byte-for-byte stable so providers that cache
+# prompt prefixes can reuse it; the scraped text is sent as the user message.
+LLM_SYSTEM_PROMPT = """
+Please convert the chess tournament events text provided by the user into a JSON array.
 Each event should have these fields:
 - title (required): The tournament name
 - start_date (required): Start date in YYYY-MM-DD format
@@ -50,9 +86,13 @@ For single-day events:
 - Only include start_date
 - Optionally include time
 
-Only return valid JSON, no other text:
+Only return valid JSON, no other text.
+"""
 
-{text}
+# Follow-up prompt sent with the previous invalid response
+LLM_REPAIR_PROMPT_TEMPLATE = """
+Your previous response could not be used: {error}
+Fix it and return only the corrected JSON array, no other text.
 """
 
 # Logging configuration
@@ -7,13 +7,23 @@ uses an LLM to structure the data, and generates an ICS calendar file.
 """
 
 import requests
+import soupsieve
+from requests.adapters import HTTPAdapter
+import re
 import json
+import orjson
+import os
 import time
+import random
+import hashlib
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
-from ics import Calendar, Event
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple, Union
+from bs4 import BeautifulSoup, SoupStrainer
 from dateutil.parser import parse as parse_date
 import config
 
@@ -24,228 +34,602 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Markdown code fence wrapped around a JSON response, e.g. ```json ... ```
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*(.*?)\s*```\s*$', re.DOTALL)
+
+# charset parameter of a Content-Type header
+_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+# Full calendar date at the start of a <time datetime="..."> value
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}(?!\d)')
+
+# Whitespace runs (including non-breaking spaces) collapsed for cache keys
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# RFC 5545 TEXT value escaping
+_ICS_ESCAPES = str.maketrans({'\\': '\\\\', ';': '\\;', ',': '\\,', '\n': '\\n', '\r': ''})
+
+# Only <body> is ever searched, so <head> (scripts, styles, meta) is never built
+_BODY_STRAINER = SoupStrainer('body')
+
+# Compile event selectors once; the union finds every candidate in one DOM walk
+_EVENT_SELECTOR_UNION = soupsieve.compile(config.EVENT_SELECTOR_UNION)
+_EVENT_SELECTORS = [(selector, soupsieve.compile(selector)) for selector in config.EVENT_SELECTORS]
+_EVENT_FIELD_SELECTORS = {
+    field: soupsieve.compile(selector) for field, selector in config.EVENT_FIELD_SELECTORS.items()
+}
+
+# Scrape cache entries are only valid for the extraction settings that built them
+_EXTRACTION_FINGERPRINT = hashlib.sha256(json.dumps([
+    config.HTML_PARSER,
+    config.EVENT_SELECTORS,
+    config.EVENT_FIELD_SELECTORS
+], sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+@lru_cache(maxsize=512)
+def _parse_date(value: str) -> datetime:
+    """Parse a date string, trying the fast ISO parser before dateutil."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return parse_date(value)
+    except OverflowError as e:
+        # dateutil overflows on long digit runs; report it like any bad date
+        raise ValueError(f"date out of range: {value!r}") from e
+
+@lru_cache(maxsize=128)
+def _parse_time(value: str) -> Tuple[int, int]:
+    """Parse an HH:MM time string into (hour, minute)."""
+    parts = value.split(":")
+    return int(parts[0]), int(parts[1])
+
+# An event validated and resolved to concrete ICS begin/end values. begin and
+# end are dates (end exclusive) for all-day events, datetimes otherwise.
+NormalizedEvent = namedtuple(
+    'NormalizedEvent', 'title begin end all_day location description'
+)
+
+def _normalize_event(event: Dict) -> NormalizedEvent:
+    """Validate an event dict and resolve its dates and times in one pass."""
+    title = str(event["title"])
+
+    # Accept the old "date" field as an alias for "start_date"
+    start_date_str = event.get("start_date", event.get("date"))
+    if not start_date_str:
+        raise ValueError("missing start_date")
+    start_date = _parse_date(start_date_str)
+
+    end_date_str = event.get("end_date")
+    if end_date_str and end_date_str != start_date_str:
+        # Multi-day event - make it all-day
+        end_date = _parse_date(end_date_str)
+        if end_date.date() < start_date.date():
+            raise ValueError("end_date before start_date")
+
+        begin = start_date.date()
+        end = (end_date + timedelta(days=1)).date()  # ICS all-day events are exclusive end
+        all_day = True
+    else:
+        # Single-day event with optional time
+        time_str = event.get("time", "12:00")
+        if time_str and ":" in time_str:
+            hour, minute = _parse_time(time_str)
+            begin = start_date.replace(hour=hour, minute=minute)
+        else:
+            begin = start_date.replace(hour=12, minute=0)
+
+        end = begin + timedelta(hours=config.DEFAULT_EVENT_DURATION_HOURS)
+        all_day = False
+
+    location = event.get("location")
+    description = event.get("description")
+    return NormalizedEvent(
+        title, begin, end, all_day,
+        str(location) if location else None,
+        str(description) if description else None
+    )
+
+def _normalize_events(items: List) -> List[NormalizedEvent]:
+    """Normalize a list of event dicts, skipping invalid entries."""
+    events = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            events.append(_normalize_event(item))
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            logger.warning(f"Skipping invalid event '{item.get('title', 'Unknown')}': {e}")
+    return events
+
+def _ics_datetime(value: datetime) -> str:
+    """Format a datetime as an ICS UTC timestamp (naive values are taken as UTC)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+def _fold_line(line: str) -> str:
+    """Fold a content line to at most 75 octets per RFC 5545 section 3.1."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    # Cut the UTF-8 bytes directly instead of measuring each character;
+    # continuation lines start with a space, so they carry 74 octets
+    parts = []
+    start, limit = 0, 75
+    while len(encoded) - start > limit:
+        cut = start + limit
+        while encoded[cut] & 0xC0 == 0x80:  # Never split a multi-byte character
+            cut -= 1
+        parts.append(encoded[start:cut].decode('utf-8'))
+        start, limit = cut, 74
+    parts.append(encoded[start:].decode('utf-8'))
+    return "\r\n ".join(parts)
+
+def _emit_vevent(uid: str, dtstamp: str, event: NormalizedEvent) -> str:
+    """Render a single VEVENT block, CRLF-terminated."""
+    if event.all_day:
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            f"DTSTAMP:{dtstamp}",
+            f"DTSTART;VALUE=DATE:{event.begin:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{event.end:%Y%m%d}",
+        ]
+    else:
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            f"DTSTAMP:{dtstamp}",
+            f"DTSTART:{_ics_datetime(event.begin)}",
+            f"DTEND:{_ics_datetime(event.end)}",
+        ]
+    lines.append(f"SUMMARY:{event.title.translate(_ICS_ESCAPES)}")
+    if event.location:
+        lines.append(f"LOCATION:{event.location.translate(_ICS_ESCAPES)}")
+    if event.description:
+        lines.append(f"DESCRIPTION:{event.description.translate(_ICS_ESCAPES)}")
+    lines.append("END:VEVENT")
+    return "".join(f"{_fold_line(line)}\r\n" for line in lines)
+
+def _cache_key(text: str) -> str:
+    """Hash the prompt for the LLM cache, ignoring whitespace-only differences."""
+    normalized = _WHITESPACE_RE.sub(' ', text).strip()
+    return hashlib.sha256(f"{config.LLM_SYSTEM_PROMPT}\0{normalized}".encode('utf-8')).hexdigest()
+
+def _extract_structured(card) -> Optional[Dict]:
+    """Read an event dict from a card's known sub-elements, or None if incomplete."""
+    title = _EVENT_FIELD_SELECTORS['title'].select_one(card)
+    dates = _EVENT_FIELD_SELECTORS['dates'].select(card, limit=2)
+    if title is None or not dates:
+        return None
+
+    title_text = title.get_text(" ", strip=True)
+    values = [date_tag['datetime'].strip() for date_tag in dates]
+    # Partial values ("19:30", "02-15") would be completed from today's date
+    # by the parser, so leave those cards to the LLM
+    if not title_text or not all(_ISO_DATE_RE.match(value) for value in values):
+        return None
+    start = values[0]
+
+    # <time datetime="YYYY-MM-DDTHH:MM"> carries the start time for single-day
+    # events; an end on the same day (e.g. 10:00-14:00) keeps it single-day
+    event = {"title": title_text, "start_date": start[:10]}
+    if len(values) > 1 and values[1][:10] != event["start_date"]:
+        event["end_date"] = values[1][:10]
+    elif len(start) >= 16 and start[10] in "T ":
+        event["time"] = start[11:16]
+
+    for field in ('location', 'description'):
+        element = _EVENT_FIELD_SELECTORS[field].select_one(card)
+        if element is not None:
+            text = element.get_text(" ", strip=True)
+            if text:
+                event[field] = text
+    return event
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to roughly max_tokens, estimated from its UTF-8 byte length."""
+    max_bytes = max_tokens * config.LLM_BYTES_PER_TOKEN
+    encoded = text.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return text
+    # Drop any multi-byte character split by the cut
+    return encoded[:max_bytes].decode('utf-8', errors='ignore')
+
 class ChessCalendarGenerator:
     """Main class for generating chess tournament calendar feeds."""
     
     def __init__(self):
         self.source_url = config.SOURCE_URL
+        self.extra_source_urls = list(config.EXTRA_SOURCE_URLS)
         self.llm_api_url = config.LLM_API_URL
         self.output_file = config.OUTPUT_FILE
+        self.cache_dir = config.CACHE_DIR
+        self._llm_slots = threading.BoundedSemaphore(config.LLM_CONCURRENCY)
+        # Events read directly from each page's cards, keyed by URL
+        self.extracted_events: Dict[str, List[Dict]] = {}
+        # Events written by the most recent generate_ics_calendar call
+        self.last_events: List[NormalizedEvent] = []
+
+        # Reuse TCP/TLS connections across scraping and LLM retries
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': config.USER_AGENT})
+        adapter = HTTPAdapter(
+            pool_connections=config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=config.HTTP_POOL_MAXSIZE,
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def close(self) -> None:
+        """Close pooled HTTP connections."""
+        self.session.close()
+
+    def __enter__(self) -> "ChessCalendarGenerator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
         
-    def scrape_events(self) -> str:
-        """Scrape event data from the chess tournaments website."""
-        logger.info(f"Scraping events from {self.source_url}")
+    @property
+    def source_urls(self) -> List[str]:
+        """All listing pages to scrape, primary source first."""
+        return [self.source_url] + self.extra_source_urls
+
+    def scrape_events(self, url: Optional[str] = None) -> str:
+        """Scrape event data from one source page, the primary source by default."""
+        return self._scrape_page(url if url is not None else self.source_url)
+
+    def _scrape_page(self, url: str) -> str:
+        """Scrape event data from a single chess tournaments page."""
+        logger.info(f"Scraping events from {url}")
         
         try:
-            headers = {
-                'User-Agent': config.USER_AGENT
-            }
-            response = requests.get(self.source_url, headers=headers, timeout=config.REQUEST_TIMEOUT)
+            # Revalidate against the last response so an unchanged page costs
+            # a 304 round-trip instead of a download and re-parse
+            cache_path = self._scrape_cache_path(url)
+            cached = self._read_cache_file(cache_path, max_age=config.SCRAPE_CACHE_TTL)
+            # Entries in an older or damaged format are treated as misses
+            if not (isinstance(cached, dict) and isinstance(cached.get("text"), str)):
+                cached = None
+            headers = {}
+            if cached:
+                if cached.get("etag"):
+                    headers['If-None-Match'] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers['If-Modified-Since'] = cached["last_modified"]
+
+            response = self.session.get(url, headers=headers, timeout=config.REQUEST_TIMEOUT)
+            if cached and response.status_code == 304:
+                logger.info(f"{url} not modified, using cached event data")
+                events = cached.get("events")
+                self.extracted_events[url] = events if isinstance(events, list) else []
+                return cached["text"]
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Try multiple selectors to find event cards
-            event_selectors = config.EVENT_SELECTORS
-            
-            event_cards = []
-            for selector in event_selectors:
-                event_cards = soup.select(selector)
-                if event_cards:
-                    logger.info(f"Found {len(event_cards)} events using selector: {selector}")
-                    break
-            
-            if not event_cards:
-                # Fallback: get all text content from main content areas
-                logger.warning("No event cards found, using fallback text extraction")
-                main_content = soup.find('main') or soup.find('body')
-                if main_content:
-                    return main_content.get_text(separator="\n", strip=True)
-                return soup.get_text(separator="\n", strip=True)
-            
-            # Extract text from event cards
-            text_blocks = []
-            for card in event_cards:
-                text = card.get_text(separator="\n", strip=True)
-                if text:
-                    text_blocks.append(text)
-            
-            raw_text = "\n\n".join(text_blocks)
-            logger.info(f"Extracted {len(raw_text)} characters of event data")
+
+            raw_text, events = self._extract_page(response)
+            self.extracted_events[url] = events
+
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self._write_cache_file(cache_path, {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "text": raw_text,
+                    "events": events
+                })
             return raw_text
             
         except requests.RequestException as e:
             logger.error(f"Failed to scrape events: {e}")
             raise
+
+    def _extract_page(self, response: requests.Response) -> Tuple[str, List[Dict]]:
+        """Extract event text, and any directly readable events, from a fetched page."""
+        # Trust a charset declared by the server so BeautifulSoup can skip
+        # its slow statistical encoding detection
+        charset = _CHARSET_RE.search(response.headers.get('Content-Type', ''))
+        encoding = charset.group(1) if charset else None
+
+        # Parse the raw bytes so decoding and tokenizing both happen in C
+        soup = BeautifulSoup(
+            response.content,
+            config.HTML_PARSER,
+            parse_only=_BODY_STRAINER,
+            from_encoding=encoding
+        )
+        
+        # Try multiple selectors to find event cards, in priority order,
+        # filtering the union's matches instead of re-walking the tree
+        candidates = _EVENT_SELECTOR_UNION.select(soup)
+        
+        event_cards = []
+        for selector, matcher in _EVENT_SELECTORS:
+            event_cards = [card for card in candidates if matcher.match(card)]
+            if event_cards:
+                logger.info(f"Found {len(event_cards)} events using selector: {selector}")
+                break
+        
+        if not event_cards:
+            # Fallback: get all text content from main content areas
+            logger.warning("No event cards found, using fallback text extraction")
+            main_content = soup.find('main') or soup.find('body')
+            if main_content:
+                return main_content.get_text(separator="\n", strip=True), []
+            return soup.get_text(separator="\n", strip=True), []
+        
+        # Extract text from event cards
+        text_blocks = []
+        events = []
+        for card in event_cards:
+            text = card.get_text(separator="\n", strip=True)
+            if text:
+                text_blocks.append(text)
+                events.append(_extract_structured(card))
+
+        # Only trust direct extraction when it understood every card
+        if None in events:
+            events = []
+        
+        raw_text = "\n\n".join(text_blocks)
+        logger.info(f"Extracted {len(raw_text)} characters of event data")
+        return raw_text, events
     
-    def call_llm_with_retry(self, raw_text: str, max_retries: int = 3, delay: int = 2) -> List[Dict]:
+    def _llm_cache_path(self, key: str) -> str:
+        """Return the on-disk path of the LLM cache entry for a key."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _scrape_cache_path(self, url: str) -> str:
+        """Return the on-disk path of the scrape cache entry for a URL."""
+        key = hashlib.sha256(f"{_EXTRACTION_FINGERPRINT}\0{url}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"scrape-{key}.json")
+
+    def _read_cache_file(self, path: str, max_age: Optional[float] = None):
+        """Load a JSON cache file, or None if missing, unreadable or older than max_age."""
+        try:
+            if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache_file(self, path: str, value) -> None:
+        """Atomically write a JSON cache file, ignoring filesystem errors."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {path}: {e}")
+
+    def _llm_cache_get(self, key: str) -> Optional[List[Dict]]:
+        """Return cached events for a key, or None if missing, expired or malformed."""
+        cached = self._read_cache_file(self._llm_cache_path(key), max_age=config.LLM_CACHE_TTL)
+        return cached if isinstance(cached, list) else None
+
+    def _llm_cache_put(self, key: str, value: List[Dict]) -> None:
+        """Store parsed events under a key, ignoring filesystem errors."""
+        self._write_cache_file(self._llm_cache_path(key), value)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Return False for HTTP errors that cannot succeed on retry (e.g. auth failures)."""
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            return status >= 500 or status in config.LLM_RETRYABLE_STATUS_CODES
+        return True
+
+    @staticmethod
+    def _backoff_delay(attempt: int, base: float) -> float:
+        """Return the exponential backoff delay with jitter for an attempt."""
+        delay = base * (2 ** (attempt - 1)) + random.uniform(0, config.LLM_BACKOFF_JITTER)
+        return min(delay, config.LLM_BACKOFF_MAX)
+
+    def _post_llm(self, messages: List[Dict]) -> str:
+        """Send a chat completion request and return the message content."""
+        response = self.session.post(
+            self.llm_api_url,
+            headers={"Content-Type": "application/json"},
+            data=orjson.dumps({"messages": messages}),
+            timeout=30
+        )
+        response.raise_for_status()
+        # Decode the body bytes directly rather than via response.text
+        return orjson.loads(response.content)["choices"][0]["message"]["content"]
+
+    def _parse_llm_content(self, content: str) -> List:
+        """Parse the JSON event array in an LLM response."""
+        # Clean up the response (remove markdown code blocks if present)
+        match = _FENCE_RE.match(content)
+        content = (match.group(1) if match else content).strip()
+        
+        # Parse JSON
+        structured_data = orjson.loads(content)
+        
+        # Validate structure
+        if not isinstance(structured_data, list):
+            raise ValueError("Response is not a JSON array")
+
+        return structured_data
+
+    def call_llm_with_retry(self, raw_text: str, max_retries: int = config.LLM_MAX_RETRIES,
+                            delay: float = config.LLM_BACKOFF_BASE) -> List[NormalizedEvent]:
         """Convert raw text to structured JSON using LLM with retry logic."""
         logger.info("Converting raw text to structured JSON using LLM")
 
-        prompt = config.LLM_PROMPT_TEMPLATE.format(text=raw_text[:4000])
+        text = _truncate_to_tokens(raw_text, config.LLM_MAX_INPUT_TOKENS)
+
+        # Static instructions first, scraped text last, so the prompt prefix
+        # is identical across runs
+        prompt_messages = [
+            {"role": "system", "content": config.LLM_SYSTEM_PROMPT},
+            {"role": "user", "content": text}
+        ]
+
+        # The text is sent as-is but looked up by its whitespace-normalized form
+        cache_key = _cache_key(text)
+        cached_events = self._llm_cache_get(cache_key)
+        if cached_events is not None:
+            valid_events = _normalize_events(cached_events)
+            if valid_events:
+                logger.info(f"Using {len(valid_events)} cached events from previous LLM response")
+                return valid_events
+            # An entry with nothing usable would otherwise fail every run until it expires
+            logger.warning("Ignoring cached LLM response with no valid events")
         
+        repairs_left = config.LLM_MAX_REPAIR_RETRIES
         for attempt in range(1, max_retries + 1):
             try:
                 logger.info(f"LLM attempt {attempt}/{max_retries}")
-                
-                response = requests.post(
-                    self.llm_api_url,
-                    headers={"Content-Type": "application/json"},
-                    json={
-                        "messages": [
-                            {"role": "user", "content": prompt}
+
+                messages = prompt_messages
+                while True:
+                    content = self._post_llm(messages)
+                    try:
+                        structured_data = self._parse_llm_content(content)
+                        valid_events = _normalize_events(structured_data)
+                        if not valid_events:
+                            raise ValueError("No valid events found in JSON response")
+                        break
+                    except ValueError as e:
+                        if repairs_left <= 0:
+                            raise
+                        # Ask the model to fix its own output rather than
+                        # re-running the full extraction from scratch
+                        repairs_left -= 1
+                        logger.warning(f"Invalid LLM response, requesting repair: {e}")
+                        messages = prompt_messages + [
+                            {"role": "assistant", "content": content},
+                            {"role": "user", "content": config.LLM_REPAIR_PROMPT_TEMPLATE.format(error=e)}
                         ]
-                    },
-                    timeout=30
-                )
-                response.raise_for_status()
-                
-                content = response.json()["choices"][0]["message"]["content"]
-                
-                # Clean up the response (remove markdown code blocks if present)
-                content = content.strip()
-                if content.startswith("```json"):
-                    content = content[7:]
-                if content.startswith("```"):
-                    content = content[3:]
-                if content.endswith("```"):
-                    content = content[:-3]
-                content = content.strip()
-                
-                # Parse JSON
-                structured_data = json.loads(content)
-                
-                # Validate structure
-                if not isinstance(structured_data, list):
-                    raise ValueError("Response is not a JSON array")
-
-                valid_events = []
-                for event in structured_data:
-                    if isinstance(event, dict) and "title" in event:
-                        # Check for either new format (start_date) or old format (date)
-                        if "start_date" in event or "date" in event:
-                            # Normalize to new format
-                            if "date" in event and "start_date" not in event:
-                                event["start_date"] = event["date"]
-                                del event["date"]
-
-                            # Validate multi-day events
-                            if "end_date" in event:
-                                try:
-                                    start = parse_date(event["start_date"]).date()
-                                    end = parse_date(event["end_date"]).date()
-                                    if end < start:
-                                        logger.warning(f"Invalid date range for event '{event['title']}': end_date before start_date")
-                                        continue
-                                except Exception as e:
-                                    logger.warning(f"Invalid date format for event '{event['title']}': {e}")
-                                    continue
-
-                            valid_events.append(event)
-
-                if not valid_events:
-                    raise ValueError("No valid events found in JSON response")
                 
                 logger.info(f"Successfully parsed {len(valid_events)} events")
+                self._llm_cache_put(cache_key, structured_data)
                 return valid_events
                 
-            except (json.JSONDecodeError, KeyError, ValueError, requests.RequestException) as e:
+            except (orjson.JSONDecodeError, KeyError, ValueError, requests.RequestException) as e:
+                if not self._is_retryable(e):
+                    logger.error(f"Attempt {attempt} failed with non-retryable error: {e}")
+                    raise RuntimeError(f"LLM processing failed: {e}") from e
+
                 logger.warning(f"Attempt {attempt} failed: {e}")
                 if attempt < max_retries:
-                    logger.info(f"Retrying in {delay} seconds...")
-                    time.sleep(delay)
+                    sleep_for = self._backoff_delay(attempt, delay)
+                    logger.info(f"Retrying in {sleep_for:.1f} seconds...")
+                    time.sleep(sleep_for)
                 else:
                     logger.error(f"Failed to get valid JSON after {max_retries} attempts")
                     raise RuntimeError(f"LLM processing failed after {max_retries} attempts: {e}")
     
-    def generate_ics_calendar(self, events_data: List[Dict]) -> str:
+    def generate_ics_calendar(self, events_data: List[Union[NormalizedEvent, Dict]]) -> str:
         """Generate ICS calendar file from structured event data."""
         logger.info(f"Generating ICS calendar with {len(events_data)} events")
         
-        calendar = Calendar()
-        calendar.creator = "Chess Tournament Calendar Feed"
+        # The output shape is fixed, so VEVENTs are formatted directly
+        # instead of building and serializing an ics object model
+        dtstamp = _ics_datetime(datetime.now(timezone.utc))
+        vevents = []
+        written = []
+        seen_uids = set()
         
-        for event_data in events_data:
+        for event in events_data:
             try:
-                event = Event()
-                event.name = event_data["title"]
-
-                # Check if this is a multi-day event
-                start_date_str = event_data["start_date"]
-                end_date_str = event_data.get("end_date")
-
-                # Parse start date
-                try:
-                    start_date = parse_date(start_date_str)
-                except:
-                    # Fallback parsing
-                    start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-
-                if end_date_str and end_date_str != start_date_str:
-                    # Multi-day event - make it all-day
-                    try:
-                        end_date = parse_date(end_date_str)
-                    except:
-                        end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
+                # Raw dicts are accepted too and normalized here
+                if not isinstance(event, NormalizedEvent):
+                    event = _normalize_event(event)
 
-                    event.begin = start_date.date()
-                    event.end = (end_date + timedelta(days=1)).date()  # ICS all-day events are exclusive end
-                    event.make_all_day()
+                # Stable UIDs let subscribed calendars update events in place
+                uid_source = f"{event.title}|{event.begin.isoformat()}|{event.location or ''}"
+                uid = f"{hashlib.sha256(uid_source.encode('utf-8')).hexdigest()[:32]}@{config.CALENDAR_UID_DOMAIN}"
+                if uid in seen_uids:
+                    logger.debug(f"Skipping duplicate event: {event.title} on {event.begin}")
+                    continue
 
-                    logger.debug(f"Added multi-day event: {event.name} from {event.begin} to {end_date.date()}")
+                vevents.append(_emit_vevent(uid, dtstamp, event))
+                written.append(event)
+                seen_uids.add(uid)
 
+                if event.all_day:
+                    logger.debug(f"Added multi-day event: {event.title} from {event.begin} to {event.end}")
                 else:
-                    # Single-day event with optional time
-                    time_str = event_data.get("time", "12:00")
-
-                    # Combine date and time
-                    if time_str and ":" in time_str:
-                        time_parts = time_str.split(":")
-                        hour = int(time_parts[0])
-                        minute = int(time_parts[1])
-                        event_datetime = start_date.replace(hour=hour, minute=minute)
-                    else:
-                        event_datetime = start_date.replace(hour=12, minute=0)
-
-                    event.begin = event_datetime
-                    event.end = event_datetime + timedelta(hours=config.DEFAULT_EVENT_DURATION_HOURS)
-
-                    logger.debug(f"Added single-day event: {event.name} on {event.begin}")
-
-                # Add optional fields
-                if "location" in event_data:
-                    event.location = event_data["location"]
-
-                if "description" in event_data:
-                    event.description = event_data["description"]
-
-                calendar.events.add(event)
+                    logger.debug(f"Added single-day event: {event.title} on {event.begin}")
 
             except Exception as e:
-                logger.warning(f"Failed to process event {event_data.get('title', 'Unknown')}: {e}")
+                title = event.get('title', 'Unknown') if isinstance(event, dict) else event.title
+                logger.warning(f"Failed to process event {title}: {e}")
                 continue
         
-        # Write calendar to file
-        with open(self.output_file, 'w', encoding='utf-8') as f:
-            f.writelines(calendar.serialize_iter())
+        header = f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{config.CALENDAR_CREATOR}\r\n"
+        footer = "END:VCALENDAR\r\n"
+
+        # Write calendar to file in a single buffered write
+        with open(self.output_file, 'wb', buffering=1 << 16) as f:
+            f.write("".join([header, *vevents, footer]).encode('utf-8'))
+        self.last_events = written
         
         logger.info(f"Calendar saved to {self.output_file}")
         return self.output_file
     
+    def _process_source(self, url: str) -> List[NormalizedEvent]:
+        """Scrape one source page and convert it to structured events."""
+        raw_text = self.scrape_events(url)
+
+        if not raw_text.strip():
+            logger.warning(f"No event data scraped from {url}")
+            return []
+
+        # Skip the LLM when the page's cards could be read directly
+        extracted = self.extracted_events.get(url, [])
+        if len(extracted) >= config.EXTRACT_MIN_EVENTS:
+            events = _normalize_events(extracted)
+            if len(events) == len(extracted):
+                logger.info(f"Using {len(events)} events extracted directly from {url}")
+                return events
+
+        # Bound concurrent LLM requests independently of page fetches
+        with self._llm_slots:
+            return self.call_llm_with_retry(raw_text)
+
+    def _process_source_safely(self, url: str) -> Tuple[List[NormalizedEvent], Optional[Exception]]:
+        """Process one source, returning its events or the error that stopped it."""
+        try:
+            return self._process_source(url), None
+        except Exception as e:
+            logger.error(f"Failed to process {url}: {e}")
+            return [], e
+
     def run(self) -> str:
         """Main execution method."""
         logger.info("Starting chess calendar generation")
         
         try:
-            # Step 1: Scrape events
-            raw_text = self.scrape_events()
-            
-            if not raw_text.strip():
+            # Steps 1-2: Scrape each source and structure it with the LLM
+            urls = self.source_urls
+            if len(urls) == 1:
+                results = [self._process_source_safely(urls[0])]
+            else:
+                # Each worker scrapes a page then hands it straight to the LLM,
+                # so later pages download while earlier ones are processed
+                workers = min(config.SCRAPE_CONCURRENCY, len(urls))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(self._process_source_safely, urls))
+
+            # One failing source must not discard the others' events
+            errors = [error for _, error in results if error is not None]
+            if len(errors) == len(urls):
+                raise errors[0]
+
+            structured_events = [event for batch, _ in results for event in batch]
+            if not structured_events:
                 raise ValueError("No event data scraped from website")
             
-            # Step 2: Structure data with LLM
-            structured_events = self.call_llm_with_retry(raw_text)
-            
             # Step 3: Generate ICS calendar
             output_file = self.generate_ics_calendar(structured_events)
             
@@ -259,8 +643,8 @@ class ChessCalendarGenerator:
 def main():
     """Main entry point."""
     try:
-        generator = ChessCalendarGenerator()
-        output_file = generator.run()
+        with ChessCalendarGenerator() as generator:
+            output_file = generator.run()
         print(f"[SUCCESS] Calendar generated successfully: {output_file}")
 
     except Exception as e:
@@ -4,97 +4,312 @@ Unit tests for Chess Tournament Calendar Generator
 """
 
 import pytest
+import copy
 import json
-import tempfile
 import os
-from unittest.mock import Mock, patch, mock_open
-from datetime import datetime
-from generate_calendar import ChessCalendarGenerator
+import requests
+from bs4 import BeautifulSoup
+from unittest.mock import Mock
+from datetime import date, datetime
+import config
+from generate_calendar import (
+    ChessCalendarGenerator, main, _fold_line, _normalize_event, _normalize_events, _parse_date,
+    _truncate_to_tokens
+)
+
+
+# Page fixtures are encoded once at import; the scraper consumes raw bytes
+_HTML_HEADERS = {'Content-Type': 'text/html; charset=utf-8'}
+
+_HTML_WITH_CARDS = b"""
+<html>
+    <body>
+        <div class="event-card">
+            <h3>Austin Chess Championship</h3>
+            <p>Date: 2024-02-15</p>
+            <p>Location: Austin Chess Club</p>
+        </div>
+        <div class="event-card">
+            <h3>Spring Tournament</h3>
+            <p>Date: 2024-03-20</p>
+            <p>Location: Community Center</p>
+        </div>
+    </body>
+</html>
+"""
+
+_HTML_EMPTY = b"""
+<html>
+    <body>
+        <main>
+            <p>Upcoming tournaments will be posted here.</p>
+            <p>Check back soon for updates!</p>
+        </main>
+    </body>
+</html>
+"""
+
+# LLM message contents as they arrive on the wire
+_LLM_CONTENT_PLAIN = (
+    '[{"title": "Austin Chess Championship", "start_date": "2024-02-15", '
+    '"time": "10:00", "location": "Austin Chess Club"}, '
+    '{"title": "Spring Tournament", "start_date": "2024-03-20", '
+    '"time": "14:00", "location": "Community Center"}]'
+)
+_LLM_CONTENT_FENCED = f"```json\n{_LLM_CONTENT_PLAIN}\n```"
+_LLM_CONTENT_SINGLE = '[{"title": "Test Event", "start_date": "2024-01-01"}]'
+# A multi-KB event array, like a full season of listings
+_LLM_CONTENT_LARGE = json.dumps([
+    {"title": f"Tournament {i}", "start_date": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+     "location": "Austin Chess Club", "description": "Rated open section " * 4}
+    for i in range(200)
+])
+
+
+def _llm_body(content):
+    """Encode a chat completions response body carrying one message."""
+    return json.dumps({"choices": [{"message": {"content": content}}]}).encode('utf-8')
+
+
+# Encoded response bodies, built once at import rather than per test
+_LLM_BODY_PLAIN = _llm_body(_LLM_CONTENT_PLAIN)
+_LLM_BODY_FENCED = _llm_body(_LLM_CONTENT_FENCED)
+_LLM_BODY_SINGLE = _llm_body(_LLM_CONTENT_SINGLE)
+_LLM_BODY_LARGE = _llm_body(_LLM_CONTENT_LARGE)
+_LLM_BODY_TRUNCATED = _llm_body('[{"title": "Test Event",')
+_LLM_BODY_NO_CHOICES = b'{"invalid": "response"}'
+
+
+def _resp(*, content=b"", headers=None, status_code=200):
+    """Build a spec'd requests.Response stand-in for mocked HTTP calls."""
+    response = Mock(spec=requests.Response)
+    response.status_code = status_code
+    response.headers = headers if headers is not None else {}
+    response.content = content
+    # Success needs no wiring: the spec'd raise_for_status already exists
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    return response
+
+
+@pytest.fixture(scope="session")
+def generator_template():
+    """Build one generator per session; tests get shallow copies of it."""
+    with ChessCalendarGenerator() as template:
+        yield template
+
+
+@pytest.fixture
+def mock_get(monkeypatch):
+    """Replace Session.get for the duration of a test."""
+    mock = Mock()
+    monkeypatch.setattr(requests.Session, "get", mock)
+    return mock
+
+
+@pytest.fixture
+def mock_post(monkeypatch):
+    """Replace Session.post for the duration of a test."""
+    mock = Mock()
+    monkeypatch.setattr(requests.Session, "post", mock)
+    return mock
+
+
+@pytest.fixture
+def mock_sleep(monkeypatch):
+    """Skip real backoff sleeps."""
+    mock = Mock()
+    monkeypatch.setattr("generate_calendar.time.sleep", mock)
+    return mock
+
+
+@pytest.fixture(scope="module")
+def tmp_ics_dir(tmp_path_factory):
+    """Shared directory for ICS output, created once per module."""
+    return tmp_path_factory.mktemp("ics")
+
 
 class TestChessCalendarGenerator:
     """Test suite for ChessCalendarGenerator class."""
+
+    @pytest.fixture
+    def generator(self, generator_template, tmp_path):
+        """Fresh generator per test, with its own cache directory."""
+        generator = copy.copy(generator_template)
+        # Rebind per-test mutable state that a shallow copy would share
+        generator.extracted_events = {}
+        generator.extra_source_urls = list(generator.extra_source_urls)
+        generator.last_events = []
+        generator.cache_dir = str(tmp_path)
+        return generator
+
+    @pytest.fixture(scope="class")
+    def generator_ro(self, generator_template):
+        """Shared generator for tests that only read its attributes."""
+        return generator_template
+
+    def test_init(self, generator_ro):
+        """Test initialization of ChessCalendarGenerator."""
+        assert generator_ro.source_url == "https://www.austinchesstournaments.com/events/"
+        assert generator_ro.llm_api_url == "https://ai.hackclub.com/chat/completions"
+        assert generator_ro.output_file == "calendar.ics"
+        assert generator_ro.session.headers["User-Agent"] == config.USER_AGENT
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.generator = ChessCalendarGenerator()
+    @pytest.mark.parametrize("html,expected_substrs", [
+        (_HTML_WITH_CARDS, ["Austin Chess Championship", "Spring Tournament", "2024-02-15", "Austin Chess Club"]),
+        (_HTML_EMPTY, ["Upcoming tournaments", "Check back soon"]),
+    ], ids=["event_cards", "no_event_cards"])
+    def test_scrape_events(self, generator, mock_get, html, expected_substrs):
+        """Test scraping pages with and without event cards."""
+        mock_get.return_value = _resp(content=html, headers=_HTML_HEADERS)
         
-    def test_init(self):
-        """Test initialization of ChessCalendarGenerator."""
-        assert self.generator.source_url == "https://www.austinchesstournaments.com/events/"
-        assert self.generator.llm_api_url == "https://ai.hackclub.com/chat/completions"
-        assert self.generator.output_file == "calendar.ics"
+        result = generator.scrape_events()
+        
+        for substr in expected_substrs:
+            assert substr in result
+        mock_get.assert_called_once()
     
-    @patch('generate_calendar.requests.get')
-    def test_scrape_events_success(self, mock_get):
-        """Test successful event scraping."""
-        # Mock HTML response
+    def test_scrape_events_selector_priority(self, generator, mock_get):
+        """Test that the first matching selector wins over broader ones."""
         mock_html = """
         <html>
             <body>
                 <div class="event-card">
-                    <h3>Austin Chess Championship</h3>
-                    <p>Date: 2024-02-15</p>
-                    <p>Location: Austin Chess Club</p>
-                </div>
-                <div class="event-card">
-                    <h3>Spring Tournament</h3>
-                    <p>Date: 2024-03-20</p>
-                    <p>Location: Community Center</p>
+                    <h3 class="event-title">Austin Chess Championship</h3>
+                    <p class="event-date">Date: 2024-02-15</p>
                 </div>
             </body>
         </html>
         """
-        
-        mock_response = Mock()
-        mock_response.text = mock_html
-        mock_response.raise_for_status.return_value = None
+
+        mock_get.return_value = _resp(content=mock_html.encode('utf-8'), headers=_HTML_HEADERS)
+
+        result = generator.scrape_events()
+
+        # Nested elements also match [class*="event"] but must not be repeated
+        assert result.count("Austin Chess Championship") == 1
+        assert result.count("2024-02-15") == 1
+
+    def test_scrape_events_declared_charset(self, generator, mock_get):
+        """Test that the charset from the Content-Type header is used to decode."""
+        mock_html = '<div class="event-card"><h3>Café Rapid Open</h3></div>'
+
+        mock_response = _resp(content=mock_html.encode('iso-8859-1'), headers={'Content-Type': 'text/html; charset=ISO-8859-1'})
         mock_get.return_value = mock_response
-        
-        result = self.generator.scrape_events()
-        
+
+        result = generator.scrape_events()
+
+        assert "Café Rapid Open" in result
+
+    def test_scrape_events_uses_lxml(self, generator, mock_get, monkeypatch):
+        """Test that pages are parsed with the lxml tree builder."""
+        spy = Mock(wraps=BeautifulSoup)
+        monkeypatch.setattr("generate_calendar.BeautifulSoup", spy)
+        mock_get.return_value = _resp(content=_HTML_WITH_CARDS, headers=_HTML_HEADERS)
+
+        generator.scrape_events()
+
+        assert spy.call_args.args[1] == "lxml"
+
+    def test_scrape_events_not_modified(self, generator, mock_get):
+        """Test that an unchanged page is revalidated and served from cache."""
+        mock_html = '<div class="event-card"><h3>Austin Chess Championship</h3></div>'
+
+        fresh_response = _resp(
+            content=mock_html.encode('utf-8'),
+            headers={'ETag': '"v1"', 'Last-Modified': 'Mon, 12 Feb 2024 10:00:00 GMT'}
+        )
+        not_modified_response = _resp(status_code=304)
+
+        mock_get.side_effect = [fresh_response, not_modified_response]
+
+        first = generator.scrape_events()
+        second = generator.scrape_events()
+
+        assert second == first
+        assert "Austin Chess Championship" in second
+        assert mock_get.call_count == 2
+        conditional_headers = mock_get.call_args.kwargs["headers"]
+        assert conditional_headers == {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Mon, 12 Feb 2024 10:00:00 GMT'
+        }
+
+    @pytest.mark.parametrize("invalidate", ["expired", "extraction_changed"])
+    def test_scrape_events_stale_cache(self, generator, mock_get, monkeypatch, invalidate):
+        """Test that expired or differently extracted pages are fetched unconditionally."""
+        mock_get.return_value = _resp(
+            content=b'<div class="event-card"><h3>Austin Chess Championship</h3></div>',
+            headers={'ETag': '"v1"'}
+        )
+        generator.scrape_events()
+
+        if invalidate == "expired":
+            for name in os.listdir(generator.cache_dir):
+                os.utime(os.path.join(generator.cache_dir, name), (0, 0))
+        else:
+            monkeypatch.setattr("generate_calendar._EXTRACTION_FINGERPRINT", "changed")
+
+        generator.scrape_events()
+
+        assert mock_get.call_args.kwargs["headers"] == {}
+
+    @pytest.mark.parametrize("entry", [["not", "a", "dict"], {"etag": '"v1"'}])
+    def test_scrape_events_malformed_cache_entry(self, generator, mock_get, entry):
+        """Test that a cache entry without cached text is ignored rather than revalidated."""
+        mock_get.return_value = _resp(content=_HTML_WITH_CARDS, headers={'ETag': '"v1"'})
+        generator.scrape_events()
+        for name in os.listdir(generator.cache_dir):
+            with open(os.path.join(generator.cache_dir, name), 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+
+        result = generator.scrape_events()
+
+        assert mock_get.call_args.kwargs["headers"] == {}
         assert "Austin Chess Championship" in result
-        assert "Spring Tournament" in result
-        assert "2024-02-15" in result
-        assert "Austin Chess Club" in result
-        mock_get.assert_called_once()
-    
-    @patch('generate_calendar.requests.get')
-    def test_scrape_events_no_event_cards(self, mock_get):
-        """Test scraping when no event cards are found."""
+
+    @pytest.mark.parametrize("entry", [{"title": "x"}, "garbage", [{"no": "title"}]])
+    def test_call_llm_with_retry_malformed_cache_entry(self, generator, mock_post, entry):
+        """Test that a cache entry with no usable events is ignored rather than returned."""
+        mock_post.return_value = _resp(content=_LLM_BODY_SINGLE)
+        generator.call_llm_with_retry("test text")
+        for name in os.listdir(generator.cache_dir):
+            with open(os.path.join(generator.cache_dir, name), 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+
+        result = generator.call_llm_with_retry("test text")
+
+        assert [e.title for e in result] == ["Test Event"]
+        assert mock_post.call_count == 2
+
+    def test_scrape_events_structured_cards(self, generator, mock_get):
+        """Test direct extraction of events from well-structured cards."""
         mock_html = """
         <html>
             <body>
-                <main>
-                    <p>Upcoming tournaments will be posted here.</p>
-                    <p>Check back soon for updates!</p>
-                </main>
+                <div class="event-card">
+                    <h3 class="event-title">Austin Chess Championship</h3>
+                    <time datetime="2024-02-15T10:00">Feb 15, 10 AM</time>
+                    <span class="event-location">Austin Chess Club</span>
+                </div>
+                <div class="event-card">
+                    <h3 class="event-title">Chess Summer Camp</h3>
+                    <time datetime="2024-07-15">Jul 15</time> - <time datetime="2024-07-19">Jul 19</time>
+                </div>
+                <div class="event-card">
+                    <h3 class="event-title">Rapid Quads</h3>
+                    <time datetime="2024-02-17T10:00">10 AM</time> - <time datetime="2024-02-17T14:00">2 PM</time>
+                </div>
             </body>
         </html>
         """
-        
-        mock_response = Mock()
-        mock_response.text = mock_html
-        mock_response.raise_for_status.return_value = None
+
+        mock_response = _resp(content=mock_html.encode('utf-8'))
         mock_get.return_value = mock_response
-        
-        result = self.generator.scrape_events()
-        
-        assert "Upcoming tournaments" in result
-        assert "Check back soon" in result
-    
-    @patch('generate_calendar.requests.get')
-    def test_scrape_events_request_failure(self, mock_get):
-        """Test handling of request failures during scraping."""
-        mock_get.side_effect = Exception("Network error")
-        
-        with pytest.raises(Exception):
-            self.generator.scrape_events()
-    
-    @patch('generate_calendar.requests.post')
-    def test_call_llm_with_retry_success(self, mock_post):
-        """Test successful LLM processing."""
-        # Mock successful LLM response
-        mock_events = [
+
+        generator.scrape_events()
+
+        assert generator.extracted_events[generator.source_url] == [
             {
                 "title": "Austin Chess Championship",
                 "start_date": "2024-02-15",
@@ -102,72 +317,160 @@ class TestChessCalendarGenerator:
                 "location": "Austin Chess Club"
             },
             {
-                "title": "Spring Tournament",
-                "start_date": "2024-03-20",
-                "time": "14:00",
-                "location": "Community Center"
+                "title": "Chess Summer Camp",
+                "start_date": "2024-07-15",
+                "end_date": "2024-07-19"
+            },
+            {
+                "title": "Rapid Quads",
+                "start_date": "2024-02-17",
+                "time": "10:00"
             }
         ]
+
+    def test_scrape_events_request_failure(self, generator, mock_get):
+        """Test handling of request failures during scraping."""
+        mock_get.side_effect = Exception("Network error")
         
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "choices": [
-                {
-                    "message": {
-                        "content": json.dumps(mock_events)
-                    }
-                }
-            ]
-        }
-        mock_response.raise_for_status.return_value = None
+        with pytest.raises(Exception):
+            generator.scrape_events()
+    
+    @pytest.mark.parametrize("body", [
+        _LLM_BODY_PLAIN,
+        _LLM_BODY_FENCED,
+    ], ids=["plain", "fenced"])
+    def test_call_llm_with_retry_success(self, generator, mock_post, body):
+        """Test successful LLM processing, with and without a markdown code fence."""
+        # Mock successful LLM response
+        mock_response = _resp(content=body)
         mock_post.return_value = mock_response
         
         raw_text = "Some tournament text"
-        result = self.generator.call_llm_with_retry(raw_text)
+        result = generator.call_llm_with_retry(raw_text)
         
         assert len(result) == 2
-        assert result[0]["title"] == "Austin Chess Championship"
-        assert result[1]["start_date"] == "2024-03-20"
+        assert result[0].title == "Austin Chess Championship"
+        assert result[0].location == "Austin Chess Club"
+        assert result[1].begin == datetime(2024, 3, 20, 14, 0)
+        assert not result[1].all_day
         mock_post.assert_called_once()
+
+        # Instructions go in a fixed system message, scraped text as the user turn
+        messages = json.loads(mock_post.call_args.kwargs["data"])["messages"]
+        assert messages == [
+            {"role": "system", "content": config.LLM_SYSTEM_PROMPT},
+            {"role": "user", "content": raw_text}
+        ]
     
-    @patch('generate_calendar.requests.post')
-    def test_call_llm_with_retry_json_cleanup(self, mock_post):
-        """Test LLM response cleanup (removing markdown code blocks)."""
-        mock_events = [{"title": "Test Event", "start_date": "2024-01-01"}]
-        
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "choices": [
-                {
-                    "message": {
-                        "content": f"```json\n{json.dumps(mock_events)}\n```"
-                    }
-                }
-            ]
-        }
-        mock_response.raise_for_status.return_value = None
+    @pytest.mark.parametrize("body,expected_count", [
+        (_LLM_BODY_SINGLE, 1),
+        (_LLM_BODY_LARGE, 200),
+    ], ids=["small_payload", "large_payload"])
+    def test_call_llm_with_retry_payload_size(self, generator, mock_post, body, expected_count):
+        """Test that response bodies of any size decode from raw bytes."""
+        mock_post.return_value = _resp(content=body)
+
+        result = generator.call_llm_with_retry("test text")
+
+        assert len(result) == expected_count
+        mock_post.return_value.json.assert_not_called()
+
+    def test_call_llm_with_retry_cache_hit(self, generator, mock_post):
+        """Test that a repeated prompt is served from the response cache."""
+        mock_response = _resp(content=_LLM_BODY_SINGLE)
         mock_post.return_value = mock_response
-        
-        result = self.generator.call_llm_with_retry("test text")
-        
-        assert len(result) == 1
-        assert result[0]["title"] == "Test Event"
-    
-    @patch('generate_calendar.requests.post')
-    def test_call_llm_with_retry_failure(self, mock_post):
+
+        first = generator.call_llm_with_retry("test text")
+        second = generator.call_llm_with_retry("test text")
+
+        assert first == second
+        assert [e.title for e in first] == ["Test Event"]
+        mock_post.assert_called_once()
+
+        # Whitespace-only changes in the scraped text still hit the cache
+        third = generator.call_llm_with_retry("  test\u00a0\n text ")
+        assert third == first
+        mock_post.assert_called_once()
+
+    def test_call_llm_with_retry_cache_expired(self, generator, mock_post):
+        """Test that expired cache entries trigger a fresh LLM call."""
+        mock_response = _resp(content=_LLM_BODY_SINGLE)
+        mock_post.return_value = mock_response
+
+        generator.call_llm_with_retry("test text")
+
+        # Age every cache entry past the TTL
+        for name in os.listdir(generator.cache_dir):
+            path = os.path.join(generator.cache_dir, name)
+            os.utime(path, (0, 0))
+
+        generator.call_llm_with_retry("test text")
+
+        assert mock_post.call_count == 2
+
+    def test_call_llm_with_retry_failure(self, generator, monkeypatch, mock_sleep):
         """Test LLM retry logic on failures."""
         # Mock response that raises KeyError (which is caught by the retry logic)
-        mock_response = Mock()
-        mock_response.json.return_value = {"invalid": "response"}  # Missing "choices" key
-        mock_response.raise_for_status.return_value = None
-        mock_post.return_value = mock_response
+        invalid_response = _resp(content=_LLM_BODY_NO_CHOICES)  # Missing "choices" key
 
+        # Only the attempt count matters, so skip Mock's per-call recording
+        def counting_post(*args, **kwargs):
+            counting_post.calls += 1
+            return invalid_response
+        counting_post.calls = 0
+        monkeypatch.setattr(requests.Session, "post", counting_post)
+
+        # The default attempt count comes from config
         with pytest.raises(RuntimeError):
-            self.generator.call_llm_with_retry("test text", max_retries=2)
+            generator.call_llm_with_retry("test text")
+
+        assert counting_post.calls == config.LLM_MAX_RETRIES
+        assert mock_sleep.call_count == config.LLM_MAX_RETRIES - 1
+
+    def test_call_llm_with_retry_invalid_json(self, generator, mock_post, mock_sleep):
+        """Test that a malformed JSON response triggers a repair request."""
+        bad_response = _resp(content=_LLM_BODY_TRUNCATED)
+        good_response = _resp(content=_LLM_BODY_SINGLE)
 
+        mock_post.side_effect = [bad_response, good_response]
+
+        result = generator.call_llm_with_retry("test text")
+
+        assert [e.title for e in result] == ["Test Event"]
         assert mock_post.call_count == 2
+        mock_sleep.assert_not_called()
+
+        # The repair request carries the invalid answer back to the model
+        repair_messages = json.loads(mock_post.call_args.kwargs["data"])["messages"]
+        assert [m["role"] for m in repair_messages] == ["system", "user", "assistant", "user"]
+        assert repair_messages[2]["content"] == '[{"title": "Test Event",'
+
+    def test_call_llm_with_retry_fails_fast_on_client_error(self, generator, mock_post, mock_sleep):
+        """Test that non-retryable HTTP errors are not retried."""
+        mock_response = _resp(status_code=401)
+        mock_post.return_value = mock_response
+
+        with pytest.raises(RuntimeError):
+            generator.call_llm_with_retry("test text", max_retries=3)
+
+        mock_post.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_call_llm_with_retry_backs_off_on_server_error(self, generator, mock_post, mock_sleep):
+        """Test that transient HTTP errors are retried with growing delays."""
+        mock_response = _resp(status_code=503)
+        mock_post.return_value = mock_response
+
+        with pytest.raises(RuntimeError):
+            generator.call_llm_with_retry("test text", max_retries=3, delay=1.0)
+
+        assert mock_post.call_count == 3
+        delays = [c.args[0] for c in mock_sleep.call_args_list]
+        assert len(delays) == 2
+        assert 1.0 <= delays[0] <= 2.0
+        assert 2.0 <= delays[1] <= 3.0
     
-    def test_generate_ics_calendar(self):
+    def test_generate_ics_calendar(self, generator, tmp_ics_dir, request):
         """Test ICS calendar generation."""
         events_data = [
             {
@@ -185,34 +488,29 @@ class TestChessCalendarGenerator:
             }
         ]
         
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Change output file to temp directory
-            original_output = self.generator.output_file
-            self.generator.output_file = os.path.join(temp_dir, "test_calendar.ics")
-            
-            try:
-                result = self.generator.generate_ics_calendar(events_data)
-                
-                assert os.path.exists(result)
-                
-                # Read and verify calendar content
-                with open(result, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                assert "BEGIN:VCALENDAR" in content
-                assert "END:VCALENDAR" in content
-                assert "Austin Chess Championship" in content
-                assert "Spring Tournament" in content
-                assert "Austin Chess Club" in content
-                
-                # Count events
-                event_count = content.count("BEGIN:VEVENT")
-                assert event_count == 2
-                
-            finally:
-                self.generator.output_file = original_output
-
-    def test_generate_ics_calendar_multiday_events(self):
+        generator.output_file = str(tmp_ics_dir / f"{request.node.name}.ics")
+        
+        result = generator.generate_ics_calendar(events_data)
+        
+        # Verify the normalized events that were written
+        events = generator.last_events
+        assert len(events) == 2
+        assert {e.title for e in events} == {"Austin Chess Championship", "Spring Tournament"}
+        assert events[0].location == "Austin Chess Club"
+
+        # ...and that they were actually serialized to the file
+        with open(result, 'rb') as f:
+            content = f.read()
+        lines = content.split(b"\r\n")
+        assert lines[0] == b"BEGIN:VCALENDAR"
+        assert content.count(b"BEGIN:VEVENT\r\n") == 2
+        assert [l for l in lines if l.startswith(b"SUMMARY:")] == [
+            b"SUMMARY:Austin Chess Championship",
+            b"SUMMARY:Spring Tournament"
+        ]
+        assert b"LOCATION:Austin Chess Club" in lines
+
+    def test_generate_ics_calendar_multiday_events(self, generator, tmp_ics_dir, request):
         """Test ICS calendar generation with multi-day events."""
         events_data = [
             {
@@ -236,66 +534,45 @@ class TestChessCalendarGenerator:
             }
         ]
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            original_output = self.generator.output_file
-            self.generator.output_file = os.path.join(temp_dir, "test_multiday_calendar.ics")
-
-            try:
-                result = self.generator.generate_ics_calendar(events_data)
-
-                assert os.path.exists(result)
-
-                # Read and verify calendar content
-                with open(result, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                assert "BEGIN:VCALENDAR" in content
-                assert "Chess Summer Camp" in content
-                assert "Weekend Tournament" in content
-                assert "Single Day Event" in content
-
-                # Count events
-                event_count = content.count("BEGIN:VEVENT")
-                assert event_count == 3
-
-                # Check for all-day events (multi-day events should not have times)
-                lines = content.split('\n')
-                camp_start_line = None
-                weekend_start_line = None
-                single_start_line = None
-
-                for i, line in enumerate(lines):
-                    if "Chess Summer Camp" in line:
-                        # Look for DTSTART in nearby lines
-                        for j in range(max(0, i-10), min(len(lines), i+10)):
-                            if lines[j].startswith("DTSTART"):
-                                camp_start_line = lines[j]
-                                break
-                    elif "Weekend Tournament" in line:
-                        for j in range(max(0, i-10), min(len(lines), i+10)):
-                            if lines[j].startswith("DTSTART"):
-                                weekend_start_line = lines[j]
-                                break
-                    elif "Single Day Event" in line:
-                        for j in range(max(0, i-10), min(len(lines), i+10)):
-                            if lines[j].startswith("DTSTART"):
-                                single_start_line = lines[j]
-                                break
-
-                # Multi-day events should be all-day (VALUE=DATE format)
-                if camp_start_line:
-                    assert "VALUE=DATE" in camp_start_line
-                if weekend_start_line:
-                    assert "VALUE=DATE" in weekend_start_line
-
-                # Single-day event should have time (no VALUE=DATE)
-                if single_start_line:
-                    assert "VALUE=DATE" not in single_start_line
-
-            finally:
-                self.generator.output_file = original_output
-
-    def test_generate_ics_calendar_invalid_event(self):
+        generator.output_file = str(tmp_ics_dir / f"{request.node.name}.ics")
+
+        result = generator.generate_ics_calendar(events_data)
+
+        assert os.path.exists(result)
+
+        # Compare raw bytes: no decode pass, and CRLF endings are checked exactly
+        with open(result, 'rb') as f:
+            content = f.read()
+
+        # One pass splits the calendar into its VEVENT blocks, keyed by summary
+        header, *events = content.split(b"BEGIN:VEVENT\r\n")
+        assert header.startswith(b"BEGIN:VCALENDAR\r\n")
+        assert events[-1].endswith(b"END:VCALENDAR\r\n")
+
+        blocks = {}
+        for block in events:
+            lines = block.split(b"\r\n")
+            summary = next(l for l in lines if l.startswith(b"SUMMARY:"))
+            blocks[summary[len(b"SUMMARY:"):]] = lines
+
+        assert len(events) == 3
+        assert set(blocks) == {b"Chess Summer Camp", b"Weekend Tournament", b"Single Day Event"}
+
+        def property_line(summary, name):
+            return next(l for l in blocks[summary] if l.startswith(name))
+
+        # Multi-day events should be all-day (VALUE=DATE format)
+        assert property_line(b"Chess Summer Camp", b"DTSTART") == b"DTSTART;VALUE=DATE:20240715"
+        assert property_line(b"Weekend Tournament", b"DTSTART") == b"DTSTART;VALUE=DATE:20240810"
+
+        # All-day DTEND is exclusive: the day after the last day
+        assert property_line(b"Chess Summer Camp", b"DTEND") == b"DTEND;VALUE=DATE:20240720"
+        assert property_line(b"Weekend Tournament", b"DTEND") == b"DTEND;VALUE=DATE:20240812"
+
+        # Single-day event should have time (no VALUE=DATE)
+        assert b"VALUE=DATE" not in property_line(b"Single Day Event", b"DTSTART")
+
+    def test_generate_ics_calendar_invalid_event(self, generator, tmp_ics_dir, request):
         """Test ICS generation with invalid event data."""
         events_data = [
             {
@@ -310,74 +587,228 @@ class TestChessCalendarGenerator:
             }
         ]
         
-        with tempfile.TemporaryDirectory() as temp_dir:
-            original_output = self.generator.output_file
-            self.generator.output_file = os.path.join(temp_dir, "test_calendar.ics")
-            
-            try:
-                result = self.generator.generate_ics_calendar(events_data)
-                
-                # Should still create calendar with valid events
-                assert os.path.exists(result)
-                
-                with open(result, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Should contain the valid event
-                assert "Valid Event" in content
-                # Should have only 1 event (invalid one skipped)
-                event_count = content.count("BEGIN:VEVENT")
-                assert event_count == 1
-                
-            finally:
-                self.generator.output_file = original_output
-    
-    @patch.object(ChessCalendarGenerator, 'scrape_events')
-    @patch.object(ChessCalendarGenerator, 'call_llm_with_retry')
-    @patch.object(ChessCalendarGenerator, 'generate_ics_calendar')
-    def test_run_success(self, mock_generate, mock_llm, mock_scrape):
+        generator.output_file = str(tmp_ics_dir / f"{request.node.name}.ics")
+        
+        result = generator.generate_ics_calendar(events_data)
+        
+        # Should have only the valid event (invalid one skipped)
+        assert [e.title for e in generator.last_events] == ["Valid Event"]
+        with open(result, 'rb') as f:
+            content = f.read()
+        assert content.count(b"BEGIN:VEVENT\r\n") == 1
+        assert b"SUMMARY:Valid Event\r\n" in content
+
+    def test_generate_ics_calendar_escaping(self, generator, tmp_ics_dir, request):
+        """Test RFC 5545 escaping and stable UIDs in generated events."""
+        events_data = [
+            {
+                "title": "Blitz; Rapid, and Classical",
+                "start_date": "2024-02-15",
+                "time": "10:00",
+                "description": "Line one\nLine two"
+            }
+        ]
+
+        generator.output_file = str(tmp_ics_dir / f"{request.node.name}.ics")
+
+        with open(generator.generate_ics_calendar(events_data), 'rb') as f:
+            first = f.read()
+        with open(generator.generate_ics_calendar(events_data), 'rb') as f:
+            second = f.read()
+
+        assert b"SUMMARY:Blitz\\; Rapid\\, and Classical\r\n" in first
+        assert b"DESCRIPTION:Line one\\nLine two\r\n" in first
+
+        uid_lines = [l for l in first.split(b"\r\n") if l.startswith(b"UID:")]
+        assert uid_lines == [l for l in second.split(b"\r\n") if l.startswith(b"UID:")]
+
+    def test_run_success(self, generator, monkeypatch):
         """Test successful end-to-end execution."""
         # Mock the pipeline
-        mock_scrape.return_value = "Raw event text"
-        mock_llm.return_value = [{"title": "Test Event", "start_date": "2024-01-01"}]
-        mock_generate.return_value = "calendar.ics"
+        mock_scrape = Mock(return_value="Raw event text")
+        mock_llm = Mock(return_value=[{"title": "Test Event", "start_date": "2024-01-01"}])
+        mock_generate = Mock(return_value="calendar.ics")
+        monkeypatch.setattr(ChessCalendarGenerator, 'scrape_events', mock_scrape)
+        monkeypatch.setattr(ChessCalendarGenerator, 'call_llm_with_retry', mock_llm)
+        monkeypatch.setattr(ChessCalendarGenerator, 'generate_ics_calendar', mock_generate)
         
-        result = self.generator.run()
+        result = generator.run()
         
         assert result == "calendar.ics"
         mock_scrape.assert_called_once()
         mock_llm.assert_called_once_with("Raw event text")
         mock_generate.assert_called_once()
     
-    @patch.object(ChessCalendarGenerator, 'scrape_events')
-    def test_run_no_data_scraped(self, mock_scrape):
+    def test_run_multiple_sources(self, generator, monkeypatch):
+        """Test that each source page is scraped and structured separately."""
+        mock_scrape = Mock()
+        monkeypatch.setattr(ChessCalendarGenerator, 'scrape_events', mock_scrape)
+        mock_llm = Mock()
+        monkeypatch.setattr(ChessCalendarGenerator, 'call_llm_with_retry', mock_llm)
+        mock_generate = Mock()
+        monkeypatch.setattr(ChessCalendarGenerator, 'generate_ics_calendar', mock_generate)
+
+        generator.source_url = "https://example.com/a"
+        generator.extra_source_urls = ["https://example.com/b"]
+
+        mock_scrape.side_effect = lambda url: f"text from {url}"
+        mock_llm.side_effect = lambda text: [{"title": text, "start_date": "2024-01-01"}]
+        mock_generate.return_value = "calendar.ics"
+
+        generator.run()
+
+        mock_scrape.assert_any_call("https://example.com/a")
+        mock_scrape.assert_any_call("https://example.com/b")
+        events = mock_generate.call_args.args[0]
+        assert [e["title"] for e in events] == [
+            "text from https://example.com/a",
+            "text from https://example.com/b"
+        ]
+
+    def test_run_tolerates_failing_source(self, generator, monkeypatch, mock_get):
+        """Test that one unreachable source does not discard the others' events."""
+        mock_llm = Mock(side_effect=lambda text: [{"title": text, "start_date": "2024-01-01"}])
+        monkeypatch.setattr(ChessCalendarGenerator, 'call_llm_with_retry', mock_llm)
+        mock_generate = Mock(return_value="calendar.ics")
+        monkeypatch.setattr(ChessCalendarGenerator, 'generate_ics_calendar', mock_generate)
+
+        def fake_get(url, **kwargs):
+            if url == "https://example.com/b":
+                raise requests.ConnectionError("unreachable")
+            return _resp(content=b'<div class="event-card"><h3>Page A Open</h3></div>')
+
+        mock_get.side_effect = fake_get
+        generator.source_url = "https://example.com/a"
+        generator.extra_source_urls = ["https://example.com/b"]
+
+        assert generator.run() == "calendar.ics"
+        events = mock_generate.call_args.args[0]
+        assert [e["title"] for e in events] == ["Page A Open"]
+
+    def test_run_all_sources_fail(self, generator, mock_get):
+        """Test that the first error is raised when every source fails."""
+        mock_get.side_effect = requests.ConnectionError("unreachable")
+        generator.extra_source_urls = ["https://example.com/b"]
+
+        with pytest.raises(requests.ConnectionError):
+            generator.run()
+
+    def test_run_skips_llm_for_structured_cards(self, generator, monkeypatch, mock_get):
+        """Test that directly extracted events bypass the LLM."""
+        mock_llm = Mock()
+        monkeypatch.setattr(ChessCalendarGenerator, 'call_llm_with_retry', mock_llm)
+        mock_generate = Mock()
+        monkeypatch.setattr(ChessCalendarGenerator, 'generate_ics_calendar', mock_generate)
+
+        mock_get.return_value = _resp(content=(
+            b'<div class="event-card"><h3>Blitz Night</h3>'
+            b'<time datetime="2024-09-05T19:30">Sep 5</time></div>'
+        ))
+        mock_generate.return_value = "calendar.ics"
+
+        generator.run()
+
+        mock_llm.assert_not_called()
+        events = mock_generate.call_args.args[0]
+        assert [(e.title, e.begin) for e in events] == [("Blitz Night", datetime(2024, 9, 5, 19, 30))]
+
+    @pytest.mark.parametrize("value", ["19:30", "02-15", "2024-02"])
+    def test_run_partial_card_date_uses_llm(self, generator, monkeypatch, mock_get, value):
+        """Test that cards without a full YYYY-MM-DD date fall back to the LLM."""
+        mock_llm = Mock(return_value=[{"title": "Blitz Night", "start_date": "2024-09-05"}])
+        monkeypatch.setattr(ChessCalendarGenerator, 'call_llm_with_retry', mock_llm)
+        monkeypatch.setattr(ChessCalendarGenerator, 'generate_ics_calendar', Mock(return_value="calendar.ics"))
+
+        mock_get.return_value = _resp(content=(
+            f'<div class="event-card"><h3>Blitz Night</h3>'
+            f'<time datetime="{value}">Tonight</time></div>'
+        ).encode('utf-8'))
+
+        generator.run()
+
+        assert generator.extracted_events[generator.source_url] == []
+        mock_llm.assert_called_once()
+
+    def test_run_no_data_scraped(self, generator, monkeypatch):
         """Test handling when no data is scraped."""
-        mock_scrape.return_value = ""
+        monkeypatch.setattr(ChessCalendarGenerator, 'scrape_events', Mock(return_value=""))
         
         with pytest.raises(ValueError, match="No event data scraped"):
-            self.generator.run()
+            generator.run()
 
-def test_main_function():
-    """Test the main function."""
-    with patch.object(ChessCalendarGenerator, 'run') as mock_run:
-        mock_run.return_value = "calendar.ics"
-        
-        # Import and test main function
-        from generate_calendar import main
-        
-        # Should not raise exception
-        main()
-        mock_run.assert_called_once()
+def test_parse_date():
+    """Test date parsing for ISO and free-form date strings."""
+    assert _parse_date("2024-02-15") == datetime(2024, 2, 15)
+    assert _parse_date("February 15, 2024") == datetime(2024, 2, 15)
 
-def test_main_function_with_error():
-    """Test main function error handling."""
-    with patch.object(ChessCalendarGenerator, 'run') as mock_run:
-        mock_run.side_effect = Exception("Test error")
-        
-        from generate_calendar import main
-        
-        with pytest.raises(SystemExit):
+    with pytest.raises(ValueError):
+        _parse_date("invalid-date")
+    # dateutil's OverflowError on long digit runs surfaces as ValueError
+    with pytest.raises(ValueError):
+        _parse_date("99999999999999999999")
+
+def test_normalize_event():
+    """Test single-pass validation and date resolution of event dicts."""
+    camp = _normalize_event({
+        "title": "Chess Summer Camp",
+        "date": "2024-07-15",
+        "end_date": "2024-07-19"
+    })
+    assert camp.all_day
+    assert camp.begin == date(2024, 7, 15)
+    assert camp.end == date(2024, 7, 20)
+
+    single = _normalize_event({"title": "Blitz Night", "start_date": "2024-09-05", "time": "19:30"})
+    assert not single.all_day
+    assert single.begin == datetime(2024, 9, 5, 19, 30)
+    assert single.end == datetime(2024, 9, 5, 22, 30)
+
+    with pytest.raises(ValueError, match="end_date before start_date"):
+        _normalize_event({"title": "Backwards", "start_date": "2024-07-19", "end_date": "2024-07-15"})
+
+    # Out-of-range dates are skipped instead of aborting the whole batch
+    assert [e.title for e in _normalize_events([
+        {"title": "Overflow", "start_date": "99999999999999999999"},
+        {"title": "Last Day", "start_date": "9999-12-30", "end_date": "9999-12-31"},
+        {"title": "Blitz Night", "start_date": "2024-09-05"}
+    ])] == ["Blitz Night"]
+
+def test_fold_line():
+    """Test RFC 5545 line folding at 75 octets without splitting characters."""
+    assert _fold_line("SUMMARY:Blitz") == "SUMMARY:Blitz"
+
+    for line in ("DESCRIPTION:" + "x" * 200, "DESCRIPTION:" + "♞é" * 60):
+        folded = _fold_line(line)
+        segments = folded.split("\r\n")
+        assert all(len(seg.encode('utf-8')) <= 75 for seg in segments)
+        assert all(seg.startswith(" ") for seg in segments[1:])
+        assert folded.replace("\r\n ", "") == line
+
+def test_truncate_to_tokens():
+    """Test prompt truncation by estimated token budget."""
+    assert _truncate_to_tokens("short text", 10) == "short text"
+
+    # 2 tokens at 4 bytes/token leaves room for two 3-byte characters
+    truncated = _truncate_to_tokens("♞" * 10, 2)
+    assert truncated == "♞" * 2
+    assert len(truncated.encode('utf-8')) <= 2 * config.LLM_BYTES_PER_TOKEN
+
+@pytest.mark.parametrize("side_effect,expected", [
+    (None, None),
+    (Exception("Test error"), SystemExit),
+], ids=["success", "error"])
+def test_main_function(monkeypatch, side_effect, expected):
+    """Test the main function and its error handling."""
+    mock_run = Mock(return_value="calendar.ics", side_effect=side_effect)
+    monkeypatch.setattr(ChessCalendarGenerator, 'run', mock_run)
+    
+    if expected:
+        with pytest.raises(expected):
             main()
+    else:
+        # Should not raise exception
+        main()
+    mock_run.assert_called_once()
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])